@@ -5,18 +5,31 @@ Polymarket Trade Tracker - Bot Telegram complet
 - Commande /add pour ajouter des wallets depuis Telegram
 - Serveur HTTP health check pour Render
 """
+from __future__ import annotations
+
 import asyncio
 import os
-import json
+import signal
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
+import orjson
 import requests
-from collections import defaultdict, Counter
+from aiolimiter import AsyncLimiter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
-from telegram import Bot, Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    # telegram est importé dans run(): le health check démarre sans attendre cet import
+    from telegram import Update
+    from telegram.ext import ContextTypes
+
 
 # ==========================================
 # HEALTH CHECK SERVER (pour Render)
@@ -47,11 +60,39 @@ DEST_CHANNEL = os.getenv('TELEGRAM_CHAT_ID', '@poly_kitti_print')
 DATA_API = "https://data-api.polymarket.com"
 GAMMA_API = "https://gamma-api.polymarket.com"
 CHECK_INTERVAL = 30
+MAX_CHECK_INTERVAL = 300  # Intervalle max quand aucun nouveau trade (backoff)
+CHECK_FETCH_LIMIT = 5  # Trades récupérés par wallet pour CHECK_INTERVAL secondes d'écart
 SUMMARY_INTERVAL_HOURS = 1
+TELEGRAM_MAX_LEN = 4000  # Taille max d'un message Telegram (marge sous 4096)
+WALLETS_FLUSH_INTERVAL = 5  # Sauvegarde différée de wallets.json (secondes)
+FETCH_WORKERS = 16  # Threads pour les appels HTTP bloquants
+API_RATE_LIMIT = 10  # Requêtes /activity max par seconde
+
+SEEN_TXS_MAX = 2000  # Nombre de tx hashes mémorisés pour éviter les doublons
+
+# Session HTTP partagée (keep-alive + pool de connexions)
+# Retries sur 429/5xx en respectant l'en-tête Retry-After
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        respect_retry_after_header=True,
+        allowed_methods=["GET"],
+    ),
+))
 
 # Fichier pour stocker les wallets (persistant)
 WALLETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wallets.json')
 
+# Journal append-only des trades déjà alertés (évite les doublons après redémarrage)
+# À placer sur un disque persistant (ex: SEEN_LOG=/var/data/seen.log sur Render)
+SEEN_LOG = os.getenv('SEEN_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seen.log'))
+SEEN_LOG_MAX_LINES = 10000  # Compactage du journal au-delà
+
 
 def load_wallets() -> dict:
     """Charge les wallets depuis le fichier JSON"""
@@ -67,8 +108,8 @@ def load_wallets() -> dict:
     # Puis charger depuis le fichier JSON (écrase les noms si existants)
     if os.path.exists(WALLETS_FILE):
         try:
-            with open(WALLETS_FILE, 'r') as f:
-                saved = json.load(f)
+            with open(WALLETS_FILE, 'rb') as f:
+                saved = orjson.loads(f.read())
                 wallets.update(saved)
         except:
             pass
@@ -77,17 +118,96 @@ def load_wallets() -> dict:
 
 
 def save_wallets(wallets: dict):
-    """Sauvegarde les wallets dans le fichier JSON"""
-    with open(WALLETS_FILE, 'w') as f:
-        json.dump(wallets, f, indent=2)
+    """Sauvegarde les wallets dans le fichier JSON (écriture atomique)"""
+    tmp_file = WALLETS_FILE + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps(wallets, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, WALLETS_FILE)
+
+
+def trade_key(act: dict, address: str) -> str:
+    """Identifiant d'un fill: le tx hash seul est partagé par les deux côtés d'un trade et par les fills d'un même ordre"""
+    g = act.get
+    return (
+        f"{g('transactionHash', '')}:{address}:{g('asset', '')}:{g('side', '')}:"
+        f"{g('size', '')}:{g('price', '')}:{g('timestamp', '')}"
+    )
+
+
+def load_seen_txs() -> OrderedDict:
+    """Charge les SEEN_TXS_MAX derniers tx hashes depuis le journal"""
+    seen = OrderedDict()
+    if os.path.exists(SEEN_LOG):
+        try:
+            with open(SEEN_LOG, 'r') as f:
+                lines = f.read().splitlines()
+            for tx_hash in lines[-SEEN_TXS_MAX:]:
+                if tx_hash:
+                    seen[tx_hash] = None
+        except OSError:
+            pass
+    return seen
+
+
+def split_message(text: str, limit: int = TELEGRAM_MAX_LEN) -> list:
+    """Découpe un message en morceaux <= limit caractères, sur les retours à la ligne"""
+    chunks = []
+    current = []
+    size = 0
+    for line in text.split('\n'):
+        # Ligne plus longue que la limite: découpe brute en dernier recours
+        while len(line) > limit:
+            if current:
+                chunks.append('\n'.join(current))
+                current, size = [], 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+
+        added = len(line) + (1 if current else 0)
+        if current and size + added > limit:
+            chunks.append('\n'.join(current))
+            current, size = [], 0
+            added = len(line)
+        current.append(line)
+        size += added
+
+    if current:
+        chunks.append('\n'.join(current))
+    # Telegram refuse les messages vides
+    return [c for c in chunks if c.strip()]
+
+
+@dataclass(slots=True)
+class MarketAgg:
+    """Agrégat des trades d'un marché pour le résumé"""
+    wallets: set = field(default_factory=set)
+    buy_count: int = 0
+    sell_count: int = 0
+    total_usdc: float = 0.0
+    price_sum: float = 0.0
+    price_n: int = 0
+    outcome_counts: Counter = field(default_factory=Counter)
+    trader_names: set = field(default_factory=set)
 
 
 class PolymarketTracker:
     def __init__(self):
         self.wallets = load_wallets()  # {address: name}
-        self.seen_txs = set()
+        self.wallets_dirty = False  # wallets modifiés, pas encore sauvegardés
+        self.check_delay = CHECK_INTERVAL  # Intervalle adaptatif des checks
+        self.seen_txs = load_seen_txs()  # trade_key() déjà alertés (LRU, ordre d'insertion)
+        self.seen_fp = None  # journal SEEN_LOG ouvert en ajout
+        self.seen_log_lines = 0
+        self.compact_seen_log()
+        # Wallets dont l'historique est déjà connu. Journal vide (premier démarrage,
+        # disque non persistant) ou wallet ajouté par /add: le premier fetch réussi
+        # mémorise les trades existants sans les alerter
+        self.primed_wallets = set(self.wallets) if self.seen_txs else set()
         self.last_summary = datetime.utcnow()
         self.app = None
+        self._ts_cache = (0, "")  # (seconde epoch, "HH:MM:SS") du dernier horodatage
+        self.executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+        self.limiter = AsyncLimiter(max_rate=API_RATE_LIMIT, time_period=1.0)
         print(f"✅ Tracker initialisé avec {len(self.wallets)} wallets")
         for addr, name in self.wallets.items():
             print(f"   - {name}: {addr[:10]}...{addr[-4:]}")
@@ -114,7 +234,7 @@ class PolymarketTracker:
             return
 
         self.wallets[address] = name
-        save_wallets(self.wallets)
+        self.wallets_dirty = True
 
         await update.message.reply_text(
             f"✅ Wallet ajouté!\n"
@@ -134,7 +254,8 @@ class PolymarketTracker:
         address = args[0].strip().lower()
         if address in self.wallets:
             name = self.wallets.pop(address)
-            save_wallets(self.wallets)
+            self.primed_wallets.discard(address)
+            self.wallets_dirty = True
             await update.message.reply_text(f"✅ Wallet supprimé: {name}")
         else:
             await update.message.reply_text("❌ Wallet non trouvé")
@@ -191,31 +312,44 @@ class PolymarketTracker:
     # API POLYMARKET
     # ==========================================
 
-    def get_wallet_activity(self, wallet: str, limit: int = 50):
-        """Récupère l'activité via data-api.polymarket.com"""
+    def _fetch_activity(self, wallet: str, limit: int) -> list | None:
+        """Appel HTTP bloquant vers data-api.polymarket.com (exécuté dans le pool), None si erreur"""
         try:
-            resp = requests.get(
+            resp = SESSION.get(
                 f"{DATA_API}/activity",
-                params={"user": wallet, "limit": limit},
+                params={"user": wallet, "limit": limit, "type": "TRADE"},
                 timeout=15
             )
             if resp.status_code == 200:
-                return resp.json()
-        except:
-            pass
-        return []
+                return orjson.loads(resp.content)
+            print(f"  API error {wallet[:8]}: HTTP {resp.status_code}")
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
+            print(f"  API error {wallet[:8]}: {e}")
+        return None
+
+    async def get_wallet_activity(self, wallet: str, limit: int = 50) -> list | None:
+        """Récupère l'activité via data-api.polymarket.com sans bloquer la boucle asyncio"""
+        async with self.limiter:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._fetch_activity, wallet, limit)
+
+    async def _fetch_for_wallet(self, address: str, name: str, limit: int) -> tuple:
+        """Récupère l'activité d'un wallet -> (address, name, activities)"""
+        return address, name, await self.get_wallet_activity(address, limit)
+
+    async def fetch_all_activity(self, limit: int) -> list:
+        """Récupère l'activité de tous les wallets en parallèle -> [(address, name, activities)]"""
+        return await asyncio.gather(*[
+            self._fetch_for_wallet(address, name, limit) for address, name in self.wallets.items()
+        ])
 
     async def send_telegram(self, message: str):
-        """Envoie un message sur le canal Telegram"""
-        bot = Bot(token=BOT_TOKEN)
+        """Envoie un message sur le canal Telegram (via le bot de l'Application)"""
+        bot = self.app.bot
         try:
-            if len(message) > 4000:
-                for i in range(0, len(message), 4000):
-                    chunk = message[i:i + 4000]
-                    await bot.send_message(chat_id=DEST_CHANNEL, text=chunk)
-                    await asyncio.sleep(0.5)
-            else:
-                await bot.send_message(chat_id=DEST_CHANNEL, text=message)
+            # Le débit est géré par l'AIORateLimiter de l'Application
+            for chunk in split_message(message):
+                await bot.send_message(chat_id=DEST_CHANNEL, text=chunk)
         except Exception as e:
             print(f"❌ Erreur Telegram: {e}")
 
@@ -223,23 +357,76 @@ class PolymarketTracker:
     # SURVEILLANCE & ALERTES
     # ==========================================
 
-    async def check_new_trades(self):
-        """Vérifie les nouveaux trades des wallets"""
-        for address, name in self.wallets.items():
+    def _fast_hms(self) -> str:
+        """Heure locale HH:MM:SS, formatée au plus une fois par seconde"""
+        t = int(time.time())
+        if t == self._ts_cache[0]:
+            return self._ts_cache[1]
+        hms = time.strftime('%H:%M:%S', time.localtime(t))
+        self._ts_cache = (t, hms)
+        return hms
+
+    def mark_seen(self, key: str):
+        """Mémorise un trade_key (mémoire + journal) en évinçant le plus ancien au-delà de SEEN_TXS_MAX"""
+        self.seen_txs[key] = None
+        self.seen_txs.move_to_end(key)
+        if len(self.seen_txs) > SEEN_TXS_MAX:
+            self.seen_txs.popitem(last=False)
+
+        if self.seen_fp is None:
+            return
+        try:
+            self.seen_fp.write(key + '\n')
+            self.seen_log_lines += 1
+            if self.seen_log_lines > SEEN_LOG_MAX_LINES:
+                self.compact_seen_log()
+        except OSError as e:
+            print(f"❌ Erreur journal seen: {e}")
+
+    def close_seen_log(self):
+        """Ferme le journal SEEN_LOG (arrêt du bot)"""
+        if self.seen_fp is None:
+            return
+        try:
+            self.seen_fp.close()
+        except OSError as e:
+            print(f"❌ Erreur journal seen: {e}")
+        self.seen_fp = None
+
+    def compact_seen_log(self):
+        """Réécrit SEEN_LOG avec les seules clés en mémoire, puis le rouvre en ajout"""
+        self.close_seen_log()
+        try:
+            tmp_file = SEEN_LOG + '.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(''.join(f"{key}\n" for key in self.seen_txs))
+            os.replace(tmp_file, SEEN_LOG)
+            self.seen_fp = open(SEEN_LOG, 'a', buffering=1)
+            self.seen_log_lines = len(self.seen_txs)
+        except OSError as e:
+            print(f"❌ Erreur journal seen: {e}")
+
+    async def check_new_trades(self, limit: int = CHECK_FETCH_LIMIT) -> int:
+        """Vérifie les nouveaux trades des wallets, retourne le nombre de nouveaux trades"""
+        new_trades = 0
+        for address, name, activities in await self.fetch_all_activity(limit=limit):
+            if activities is None:
+                continue  # Fetch en erreur: le wallet n'est pas marqué comme amorcé
+            priming = address not in self.primed_wallets
             try:
-                activities = self.get_wallet_activity(address, limit=5)
+                trade_acts = [a for a in activities if isinstance(a, dict) and a.get('type') == 'TRADE']
 
-                for act in activities:
-                    if not isinstance(act, dict):
+                for act in trade_acts:
+                    if not act.get('transactionHash'):
                         continue
-                    if act.get('type') != 'TRADE':
+                    key = trade_key(act, address)
+                    if key in self.seen_txs:
                         continue
 
-                    tx_hash = act.get('transactionHash', '')
-                    if not tx_hash or tx_hash in self.seen_txs:
+                    self.mark_seen(key)
+                    if priming:
                         continue
-
-                    self.seen_txs.add(tx_hash)
+                    new_trades += 1
 
                     side = act.get('side', 'N/A')
                     title = act.get('title', 'Unknown')
@@ -253,66 +440,88 @@ class PolymarketTracker:
                         f"📊 {title}\n"
                         f"🎯 Outcome: {outcome}\n"
                         f"💰 ${usdc:,.2f} @ {price:.2f}\n"
-                        f"⏰ {datetime.now().strftime('%H:%M:%S')}"
+                        f"⏰ {self._fast_hms()}"
                     )
                     await self.send_telegram(msg)
                     print(f"{emoji} {name}: {side} ${usdc:.0f} on {title[:40]}...")
 
             except Exception as e:
                 print(f"  Check error {address[:8]}: {e}")
+                continue
+
+            if priming:
+                self.primed_wallets.add(address)
+                print(f"📥 {name}: historique mémorisé (sans alerte)")
 
-        # Nettoyer les vieux tx hashes
-        if len(self.seen_txs) > 2000:
-            self.seen_txs = set(list(self.seen_txs)[-1000:])
+        return new_trades
 
     # ==========================================
     # RÉSUMÉ 6H
     # ==========================================
 
+    def _fold_trades(self, market_buys: dict, address: str, name: str, activities: list) -> int:
+        """Ajoute les trades d'un wallet aux agrégats par marché, retourne le nombre de trades comptés"""
+        total_trades = 0
+        get_agg = market_buys.get
+
+        for act in activities:
+            if not isinstance(act, dict):
+                continue
+            g = act.get
+            if g('type') != 'TRADE':
+                continue
+
+            title = g('title', '')
+            if not title:
+                continue
+
+            usdc = float(g('usdcSize', 0) or 0)
+            price = float(g('price', 0) or 0)
+
+            # Ignorer les lignes vides avant de créer l'agrégat du marché
+            if usdc <= 0 or price <= 0:
+                continue
+
+            side = g('side', '').upper()
+            outcome = g('outcome', '')
+
+            total_trades += 1
+            agg = get_agg(title)
+            if agg is None:
+                agg = market_buys[title] = MarketAgg()
+            agg.wallets.add(address)
+            agg.total_usdc += usdc
+            agg.trader_names.add(name)
+            agg.price_sum += price
+            agg.price_n += 1
+            agg.buy_count += side == 'BUY'
+            agg.sell_count += side == 'SELL'
+
+            if outcome:
+                agg.outcome_counts[outcome] += 1
+
+        return total_trades
+
     async def generate_wallet_summary(self) -> str:
         """Génère le résumé des achats classé par marché"""
-        market_buys = defaultdict(lambda: {
-            "wallets": set(), "wallet_names": [],
-            "buy_count": 0, "sell_count": 0,
-            "total_usdc": 0.0, "prices": [],
-            "outcomes": [], "trader_names": set(),
-        })
+        market_buys = {}  # {title: MarketAgg}
 
         total_trades = 0
 
-        for address, name in self.wallets.items():
-            activities = self.get_wallet_activity(address, limit=50)
-
-            for act in activities:
-                if not isinstance(act, dict) or act.get('type') != 'TRADE':
-                    continue
-
-                title = act.get('title', '')
-                if not title:
-                    continue
-
-                total_trades += 1
-                side = act.get('side', '')
-                usdc = float(act.get('usdcSize', 0) or 0)
-                price = float(act.get('price', 0) or 0)
-                outcome = act.get('outcome', '')
-
-                market_buys[title]["wallets"].add(address)
-                market_buys[title]["wallet_names"].append(name)
-                market_buys[title]["total_usdc"] += usdc
-                market_buys[title]["trader_names"].add(name)
-
-                if price > 0:
-                    market_buys[title]["prices"].append(price)
-                if outcome:
-                    market_buys[title]["outcomes"].append(outcome)
-
-                if side.upper() == 'BUY':
-                    market_buys[title]["buy_count"] += 1
-                elif side.upper() == 'SELL':
-                    market_buys[title]["sell_count"] += 1
-
-            await asyncio.sleep(0.3)
+        # Agréger chaque wallet dès que sa réponse arrive
+        tasks = [
+            asyncio.create_task(self._fetch_for_wallet(address, name, 50))
+            for address, name in self.wallets.items()
+        ]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                address, name, activities = await fut
+                total_trades += self._fold_trades(market_buys, address, name, activities or [])
+        finally:
+            # En cas d'erreur, annuler les fetchs restants et récupérer leurs exceptions
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         if not market_buys:
             return ""
@@ -320,7 +529,7 @@ class PolymarketTracker:
         # Trier par BUY décroissant
         sorted_markets = sorted(
             market_buys.items(),
-            key=lambda x: x[1]["buy_count"],
+            key=lambda x: x[1].buy_count,
             reverse=True
         )
 
@@ -332,34 +541,33 @@ class PolymarketTracker:
             f"{'='*30}\n",
         ]
 
-        for i, (market, data) in enumerate(sorted_markets[:15], 1):
-            avg_price = sum(data["prices"]) / len(data["prices"]) if data["prices"] else 0
-            wallet_count = len(data["wallets"])
+        for i, (market, agg) in enumerate(sorted_markets[:15], 1):
+            avg_price = agg.price_sum / agg.price_n if agg.price_n else 0
+            wallet_count = len(agg.wallets)
 
-            if data["buy_count"] >= 5:
+            if agg.buy_count >= 5:
                 fire = "🔥🔥🔥 "
-            elif data["buy_count"] >= 3:
+            elif agg.buy_count >= 3:
                 fire = "🔥🔥 "
-            elif data["buy_count"] >= 2:
+            elif agg.buy_count >= 2:
                 fire = "🔥 "
             else:
                 fire = ""
 
             top_outcome = ""
-            if data["outcomes"]:
-                top = Counter(data["outcomes"]).most_common(1)[0]
+            if agg.outcome_counts:
+                top = agg.outcome_counts.most_common(1)[0]
                 top_outcome = f" → {top[0]}"
 
-            traders = ", ".join(data["trader_names"])
+            traders = ", ".join(agg.trader_names)
 
-            lines.append(f"{i}. {market[:55]}")
             lines.append(
-                f"   {fire}BUY: {data['buy_count']} | SELL: {data['sell_count']} | "
-                f"Wallets: {wallet_count}"
+                f"{i}. {market[:55]}\n"
+                f"   {fire}BUY: {agg.buy_count} | SELL: {agg.sell_count} | "
+                f"Wallets: {wallet_count}\n"
+                f"   Vol: ${agg.total_usdc:,.0f} | Prix moy: {avg_price:.2f}{top_outcome}\n"
+                f"   👛 {traders}\n"
             )
-            lines.append(f"   Vol: ${data['total_usdc']:,.0f} | Prix moy: {avg_price:.2f}{top_outcome}")
-            lines.append(f"   👛 {traders}")
-            lines.append("")
 
         return "\n".join(lines)
 
@@ -368,12 +576,36 @@ class PolymarketTracker:
     # ==========================================
 
     async def periodic_check(self, context: ContextTypes.DEFAULT_TYPE):
-        """Appelé toutes les CHECK_INTERVAL secondes"""
+        """Check des trades puis replanification: CHECK_INTERVAL si activité, sinon backoff x2"""
+        new_trades = 0
+        # Plus l'écart depuis le dernier check est long, plus on remonte loin
+        limit = max(CHECK_FETCH_LIMIT, CHECK_FETCH_LIMIT * self.check_delay // CHECK_INTERVAL)
         try:
-            await self.check_new_trades()
+            new_trades = await self.check_new_trades(limit)
         except Exception as e:
             print(f"❌ Periodic check error: {e}")
 
+        if new_trades:
+            self.check_delay = CHECK_INTERVAL
+        else:
+            self.check_delay = min(self.check_delay * 2, MAX_CHECK_INTERVAL)
+        context.job_queue.run_once(self.periodic_check, when=self.check_delay)
+
+    def flush_wallets(self):
+        """Écrit wallets.json si des wallets ont été ajoutés/supprimés"""
+        if not self.wallets_dirty:
+            return
+        self.wallets_dirty = False
+        try:
+            save_wallets(self.wallets)
+        except OSError as e:
+            self.wallets_dirty = True
+            print(f"❌ Erreur sauvegarde wallets: {e}")
+
+    async def periodic_flush_wallets(self, context: ContextTypes.DEFAULT_TYPE):
+        """Appelé toutes les WALLETS_FLUSH_INTERVAL secondes"""
+        self.flush_wallets()
+
     async def periodic_summary(self, context: ContextTypes.DEFAULT_TYPE):
         """Appelé toutes les 6 heures"""
         print(f"📊 Génération du résumé {SUMMARY_INTERVAL_HOURS}h...")
@@ -394,12 +626,18 @@ class PolymarketTracker:
         print("="*50)
         print(f"📤 Canal: {DEST_CHANNEL}")
         print(f"👛 Wallets: {len(self.wallets)}")
-        print(f"⏱️ Check: toutes les {CHECK_INTERVAL}s")
+        print(f"⏱️ Check: toutes les {CHECK_INTERVAL}s (jusqu'à {MAX_CHECK_INTERVAL}s sans activité)")
         print(f"📊 Résumé: toutes les {SUMMARY_INTERVAL_HOURS}h")
         print("="*50)
 
+        # Les tâches démarrent immédiatement, sans attendre un tour de boucle (Python 3.12+)
+        if hasattr(asyncio, "eager_task_factory"):
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
+        from telegram.ext import AIORateLimiter, Application, CommandHandler
+
         # Créer l'application Telegram
-        self.app = Application.builder().token(BOT_TOKEN).build()
+        self.app = Application.builder().token(BOT_TOKEN).rate_limiter(AIORateLimiter()).build()
 
         # Ajouter les commandes
         self.app.add_handler(CommandHandler("start", self.cmd_start))
@@ -409,7 +647,7 @@ class PolymarketTracker:
         self.app.add_handler(CommandHandler("list", self.cmd_list))
         self.app.add_handler(CommandHandler("summary", self.cmd_summary))
 
-        # Résumé automatique toutes les 6h (pas d'alertes individuelles)
+        # Résumé automatique toutes les SUMMARY_INTERVAL_HOURS heures
         job_queue = self.app.job_queue
         job_queue.run_repeating(
             self.periodic_summary,
@@ -417,7 +655,22 @@ class PolymarketTracker:
             first=60
         )
 
-        # Envoyer message de démarrage
+        # Alertes trades: periodic_check se replanifie lui-même (intervalle adaptatif)
+        job_queue.run_once(self.periodic_check, when=10)
+
+        # Sauvegarde différée des wallets (/add, /remove)
+        job_queue.run_repeating(
+            self.periodic_flush_wallets,
+            interval=WALLETS_FLUSH_INTERVAL,
+            first=WALLETS_FLUSH_INTERVAL
+        )
+
+        # Démarrer le bot
+        await self.app.initialize()
+        await self.app.start()
+        await self.app.updater.start_polling()
+
+        # Envoyer message de démarrage (le bot de l'Application est initialisé)
         await self.send_telegram(
             f"🚀 Bot Polymarket démarré!\n"
             f"👛 {len(self.wallets)} wallets surveillés\n"
@@ -428,17 +681,15 @@ class PolymarketTracker:
         print("\n✅ Bot démarré! En attente de commandes et trades...")
         print("Tapez Ctrl+C pour arrêter\n")
 
-        # Démarrer le bot
-        await self.app.initialize()
-        await self.app.start()
-        await self.app.updater.start_polling()
-
-        # Garder le bot en vie
+        # Garder le bot en vie jusqu'à SIGTERM (Render/Docker) ou Ctrl+C (annule la tâche)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
         try:
-            while True:
-                await asyncio.sleep(1)
-        except (KeyboardInterrupt, SystemExit):
+            await stop.wait()
+        finally:
             print("\n⏹️ Arrêt du bot...")
+            self.flush_wallets()
+            self.close_seen_log()
             await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()